@@ -1,9 +1,117 @@
+from __future__ import annotations
+
 import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from PyPDF2 import PdfReader, PdfWriter
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pikepdf
+
+
+_PDF_CACHE_SIZE = 8
+_pdf_cache: OrderedDict[tuple[str, int], pikepdf.Pdf] = OrderedDict()
+
+
+def _open_pdf(path: str) -> pikepdf.Pdf:
+    """Open *path* for reading."""
+    import pikepdf
+
+    # QPDF resolves objects lazily, so with mmap only the pages we copy are read
+    return pikepdf.open(path, access_mode=pikepdf.AccessMode.mmap)
+
+
+def _cached_pdf(path: str, mtime_ns: int) -> pikepdf.Pdf:
+    """Open *path* once and reuse it until the file's mtime changes."""
+    key = (path, mtime_ns)
+    pdf = _pdf_cache.get(key)
+    if pdf is not None:
+        _pdf_cache.move_to_end(key)
+        return pdf
+
+    # An entry for an older version of the file can never be hit again
+    for stale_key in [k for k in _pdf_cache if k[0] == path]:
+        _pdf_cache.pop(stale_key).close()
+
+    pdf = _pdf_cache[key] = _open_pdf(path)
+    if len(_pdf_cache) > _PDF_CACHE_SIZE:
+        _, oldest = _pdf_cache.popitem(last=False)
+        oldest.close()
+    return pdf
+
+
+def close_cached_pdfs() -> None:
+    """Close every source PDF kept open by ``cache_source=True`` calls."""
+    while _pdf_cache:
+        _, pdf = _pdf_cache.popitem()
+        pdf.close()
+
+
+def _extract_from_pdf(src: pikepdf.Pdf, start: int, end: int, output_path: Path) -> None:
+    """Copy pages *start* to *end* of the already opened *src* to *output_path*."""
+    import pikepdf
+
+    with pikepdf.new() as dst:
+        # Convert to 0-indexed and copy the requested pages in one native call
+        dst.pages.extend(src.pages[start - 1:end])
+        dst.save(str(output_path))
+
+
+def _copy_atomic(pdf_path: Path, output_path: Path) -> None:
+    """Copy *pdf_path* to *output_path* through a temporary file and a rename."""
+    fd, tmp_name = tempfile.mkstemp(
+        dir=output_path.parent, prefix=f".{output_path.name}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        shutil.copyfile(pdf_path, tmp_name)
+        os.replace(tmp_name, output_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+
+_STAMP_KIND = "extract_page_range"
+
 
+def _stamp_path(output_path: Path) -> Path:
+    """Return the sidecar file recording what *output_path* was built from."""
+    return output_path.with_name(f".{output_path.name}.extract-stamp.json")
 
-def extract_page_range(pdf_path: Path, start: int, end: int, output_path: Path) -> None:
+
+def _read_stamp(stamp_path: Path) -> dict | None:
+    """Return our fingerprint stored in *stamp_path*, or ``None`` if there is none."""
+    try:
+        stamp = json.loads(stamp_path.read_text())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(stamp, dict) or stamp.get("kind") != _STAMP_KIND:
+        return None
+    return stamp
+
+
+def _output_stat(output_path: Path) -> dict | None:
+    """Return the size and mtime of *output_path*, or ``None`` if it is missing."""
+    try:
+        st = output_path.stat()
+    except FileNotFoundError:
+        return None
+    return {"output_size": st.st_size, "output_mtime_ns": st.st_mtime_ns}
+
+
+def extract_page_range(
+    pdf_path: Path,
+    start: int,
+    end: int,
+    output_path: Path,
+    skip_unchanged: bool = False,
+    cache_source: bool = False,
+) -> None:
     """Extract pages from *start* to *end* from *pdf_path* and write to *output_path*.
 
     Parameters
@@ -16,16 +124,73 @@ def extract_page_range(pdf_path: Path, start: int, end: int, output_path: Path)
         The last page to extract (inclusive, 1-indexed).
     output_path : Path
         Where the resulting PDF will be written.
+    skip_unchanged : bool
+        If true, record the source mtime, the range and the output's size
+        and mtime in a hidden ``.<name>.extract-stamp.json`` sidecar next
+        to *output_path*, and do nothing when the sidecar shows
+        *output_path* is still the file a previous run produced from the
+        same source and range.
+    cache_source : bool
+        If true, keep *pdf_path* open after returning so later calls on the
+        same unchanged file skip reparsing it. Release such files with
+        :func:`close_cached_pdfs`. By default the source is closed before
+        returning.
+
+    Raises
+    ------
+    ValueError
+        If *start* is less than 1, greater than *end*, or past the last
+        page of *pdf_path*.
     """
-    reader = PdfReader(str(pdf_path))
-    writer = PdfWriter()
+    if start < 1 or start > end:
+        raise ValueError(f"invalid page range {start}-{end}")
 
-    # Convert to 0-indexed for PyPDF2 and iterate over the requested pages
-    for page in reader.pages[start - 1:end]:
-        writer.add_page(page)
+    mtime_ns = pdf_path.stat().st_mtime_ns
+    fingerprint = {
+        "kind": _STAMP_KIND,
+        "source": str(pdf_path.resolve()),
+        "mtime_ns": mtime_ns,
+        "start": start,
+        "end": end,
+    }
+    stamp_path = _stamp_path(output_path)
+    if skip_unchanged:
+        output_stat = _output_stat(output_path)
+        if output_stat is not None and _read_stamp(stamp_path) == {**fingerprint, **output_stat}:
+            return
 
-    with output_path.open("wb") as fh:
-        writer.write(fh)
+    # Drop any old sidecar of ours first so a rewritten or half-written output
+    # is never trusted; a file we did not write is left alone
+    if _read_stamp(stamp_path) is not None:
+        stamp_path.unlink(missing_ok=True)
+
+    if cache_source:
+        src = _cached_pdf(str(pdf_path), mtime_ns)
+    else:
+        src = _open_pdf(str(pdf_path))
+    try:
+        num_pages = len(src.pages)
+        if start > num_pages:
+            raise ValueError(
+                f"{pdf_path}: start page {start} is past the last page ({num_pages})")
+        # Count the real page tree: a stale /Count would make us copy the wrong document
+        if start == 1 and end >= num_pages and not src.is_encrypted:
+            # The whole document was requested, so a byte copy is all that's needed.
+            # Encrypted sources go through QPDF like any slice so both paths agree.
+            _copy_atomic(pdf_path, output_path)
+        else:
+            _extract_from_pdf(src, start, end, output_path)
+    finally:
+        if not cache_source:
+            src.close()
+
+    if skip_unchanged:
+        stamp_path.write_text(json.dumps({**fingerprint, **_output_stat(output_path)}))
+
+
+def _dest_for(pdf_path: Path, out_dir: Path, suffix: str) -> Path:
+    """Return the output path in *out_dir* for *pdf_path*, tagged with *suffix*."""
+    return out_dir / (pdf_path.stem + suffix + pdf_path.suffix)
 
 
 def main() -> None:
@@ -54,15 +219,73 @@ def main() -> None:
         type=Path,
         help="Directory where extracted PDFs will be saved",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes (default: one per CPU)",
+    )
+    parser.add_argument(
+        "--skip-unchanged",
+        action="store_true",
+        help="Skip outputs already extracted from an unchanged source",
+    )
     args = parser.parse_args()
 
-    args.output_dir.mkdir(parents=True, exist_ok=True)
+    # Reject a bad range up front rather than once per file in the workers
+    if args.start < 1 or args.start > args.end:
+        parser.error(f"invalid page range {args.start}-{args.end}")
+    if args.jobs is not None and args.jobs < 1:
+        parser.error(f"--jobs must be at least 1, got {args.jobs}")
 
+    # Two workers must never write the same destination: drop repeats of the
+    # same file and refuse different files that would share an output name
+    suffix = f"_pages_{args.start}-{args.end}"
+    sources_by_dest = {}
     for pdf in args.pdfs:
         pdf_path = Path(pdf)
-        out_name = f"{pdf_path.stem}_pages_{args.start}-{args.end}{pdf_path.suffix}"
-        extract_page_range(pdf_path, args.start, args.end, args.output_dir / out_name)
+        dest = _dest_for(pdf_path, args.output_dir, suffix)
+        other = sources_by_dest.setdefault(dest, pdf_path)
+        if other.resolve() != pdf_path.resolve():
+            parser.error(f"{other} and {pdf_path} would both be written to {dest}")
+
+    tasks = [
+        (pdf_path, args.start, args.end, dest, args.skip_unchanged)
+        for dest, pdf_path in sources_by_dest.items()
+    ]
+
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+
+    errors = []
+    if len(tasks) == 1 or args.jobs == 1:
+        # A worker process would only add start-up cost for a single task
+        for task in tasks:
+            try:
+                extract_page_range(*task)
+            except Exception as exc:
+                errors.append((task[0], exc))
+    else:
+        # Each file is independent, so spread them over a process pool
+        max_workers = min(len(tasks), args.jobs or os.cpu_count() or 1)
+        if sys.platform == "win32":
+            # ProcessPoolExecutor refuses more than 61 workers on Windows
+            max_workers = min(max_workers, 61)
+        with ProcessPoolExecutor(max_workers=max_workers) as ex:
+            futures = [(task[0], ex.submit(extract_page_range, *task)) for task in tasks]
+        for pdf_path, future in futures:
+            exc = future.exception()
+            if exc is not None:
+                errors.append((pdf_path, exc))
+
+    for pdf_path, exc in errors:
+        # pikepdf errors already start with the file name
+        message = str(exc)
+        if not message.startswith(str(pdf_path)):
+            message = f"{pdf_path}: {message}"
+        print(message, file=sys.stderr)
 
+    if errors:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()